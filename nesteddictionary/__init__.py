@@ -11,22 +11,96 @@ Features:
 
 from typing import (
     Any,
+    Callable,
+    Dict,
     ItemsView,
     Iterable,
     Iterator,
     KeysView,
+    List,
     Optional,
+    Sequence,
+    Tuple,
     Type,
     TypeVar,
     ValuesView,
     Union
 )
 
-from functools import reduce
-import operator
+from functools import lru_cache
+from types import MappingProxyType
+import json
+
+try:
+    from ._nested_c import findkeys as _c_findkeys, flatten_soa as _c_flatten_soa, traverse as _c_traverse   # type: ignore  #optional Cython extension, see setup.py
+except ImportError:                                                                                         #not built; fall back to the pure-Python loops
+    _c_findkeys = _c_flatten_soa = _c_traverse = None
 
 #User Exceptions
-class KeypathError(Exception): pass #currently only used to track keypath errors durning _construct_path
+from ._exceptions import KeypathError
+
+_INDEX = object() #stands in for the key of list entries in the flattened arrays; equal to nothing, so findall never matches a list index
+
+_FINDALL_CACHE_SIZE = 128 #number of search keys whose findall results are kept per NestedDict
+
+#Keypath string parsing
+def _cast_index(item: str) -> Union[int,str]:
+    '''
+    Casts item into an int if it is integer-like (i.e., "3" or "-1"), otherwise returns the original item. Used with parsing a keypath_str.
+    Integer-like items are recognized with str.isdecimal, so no exception is raised (and caught) for the common, non-numeric keys.
+    '''
+    if item.isdecimal() or ( item[:1] == '-' and item[1:].isdecimal() ):   #isdecimal (not isdigit) accepts exactly the digits int() does
+        return int(item)
+    return item
+
+@lru_cache(maxsize=4096)
+def _parse_keypath(keypath_str: str, sep: str) -> Tuple[Any,...]:
+    '''
+    Parses a keypath string into a tuple of keys. Results are memoized since the same keypath strings tend to be reused many times (i.e., JSON traversal or config lookups); a tuple is returned so the cached keypath can't be mutated by callers.
+    '''
+    return tuple(_cast_index(item) for item in keypath_str.split(sep))
+
+#Path construction steps (used through _step); each returns the child container at key, creating it if missing
+def _step_dict(d: dict, key: Any) -> Any:
+    return d.setdefault(key, {})
+
+def _step_list(d: list, key: Any) -> Any:
+    n = len(d)
+    if key == n:            #if consecutive index given, append a new dictionary for a new list
+        d.append({})
+    elif not isinstance(key, int):
+        raise TypeError(f'[{key}] TypeError: list indices must be integers, not {type(key).__name__}')
+    elif not -n <= key < n: #out-of-range keys are rejected before indexing so the error names the key
+        raise IndexError(f'[{key}] IndexError: list index out of range')
+    return d[key]
+
+_STEP: Dict[type,Callable[[Any,Any],Any]] = { dict: _step_dict, list: _step_list }
+
+def _step(d: Any, key: Any) -> Any:
+    '''
+    Takes one path construction step from container d, dispatched on its type through _STEP (subclasses, i.e., OrderedDict or defaultdict, fall back to an isinstance check). Shared by NestedDict._construct_path and NestedDict.bulk_insert.
+    '''
+    step = _STEP.get( type(d) )
+    if step is None:
+        if isinstance(d, dict):
+            step = _step_dict
+        elif isinstance(d, list):
+            step = _step_list
+        else:
+            raise TypeError(f'[{key}] TypeError: a {type(d).__name__} value cannot be traversed')
+    return step(d, key)
+
+#Flattened-array helpers (used by NestedDict._flatten_soa and the searches built on it)
+def _keypath(steps: list, parents: List[int], i: int) -> list:
+    '''
+    Rebuilds the keypath (as a new list) of entry i of the flattened arrays by following its parents.
+    '''
+    keypath = []
+    while i >= 0:
+        keypath.append( steps[i] )
+        i = parents[i]
+    keypath.reverse()
+    return keypath
 
 class NestedDict:
     '''
@@ -39,6 +113,7 @@ class NestedDict:
     Caveats:
      - JSON dumps cannot be done directly. Either unnest (i.e.,: nested_dict.unnest()) before calling dumps or use the built in dumps methdod (ex: nested_dict.dumps())
      - If setting an int as a new destination key, it is assumed to be a dictionary key and not a list index. If inserting a list using an index is desired, the list must first be set as a value at the parent level. It can then be indexed, but only at the list's length at most (use the len function for a nested list and its value to insert a new obj in the list, or just use append).
+     - By default nothing is cached: findall, findall_kv and flatten walk the live data on every call. With NestedDict(data, cache=True) they are served from a flattened index instead, built once and invalidated by any change made through a NestedDict (including the NestedDicts returned for nested values). Changes made directly to the underlying data (i.e., through unnest(), at(), copy(), view(), values returned by flatten or the original dict) are then not seen until invalidate() is called; only use cache=True for data that isn't changed behind the NestedDict's back.
      - This is a tool to make accessing a dictionary easier to program, especially requests results (like from AWS). This is slower then accessing a regular dictionary the usual way (which is probably why something simialar hasn't been implemented already). Use at your own lesiure.
 
     Scriptability:
@@ -46,6 +121,11 @@ class NestedDict:
      - Use keypath; a list of keys, i.e., nested_dict[["path","to","key"]] which is the same as nested_dict["path"]["to"]["key"] in normal dictionaries
     
     Methods:
+     - path: Variadic keypath access, nested_dict.path("path","to","key"); no keypath list or intermediate NestedDict objects are created, so it reads about as fast as subscripting with a keypath list (at is the fastest read when the raw value is enough).
+     - at: Like subscripting (a key or a keypath list) but returns the raw value; dicts and lists are not wrapped as NestedDict.
+     - view: Read-only, zero-copy view of the top-level dict (a MappingProxyType; lists are returned as a tuple). Cheaper than copy() when only reading or iterating.
+     - bulk_insert: insert for many (keypath, value) pairs at once; consecutive keypaths with the same leading keys reuse the containers already reached instead of descending from the top again.
+     - flatten: Flattens to a plain dict keyed by keypath tuples (ex: {('path',):{...}, ('path','to'):{...}, ('path','to','key'):'val'}). With cache=True, cached until the NestedDict is modified.
      - findall: Finds all key paths, returned in a list; key paths are represented by a list (ex: ["path","to","key"]). Example return: [ ['path','to','key'], ['another_path','to','key'] ].
      - findall_kv (key/value): Finds all key paths and their values stored in a dictionary, returns in a list; Key/value dictionary has 2 keys: 'keypath' and 'value'. keypath is a key path list and value is the child of this keypath. If values are frequently accessed using a search, it may be more efficient to get at the value using this function. Example return: [ { 'keypath':['path','to','key'], 'value': } ]
  
@@ -53,65 +133,84 @@ class NestedDict:
     NOTE: For keypaths, a tuple is simplier than a list, however, tuples can be real keys for a normal dictionary and this interfers with this behavior.
     '''
 
-    __slots__ = ("_data","_datatype") #self variables must be listed here
+    __slots__ = ("_data","_version","_cache") #self variables must be listed here
 
-    def __init__( self, data: Optional[dict] = None ) -> None:
+    def __init__( self, data: Any = None, cache: bool = False, _version: Optional[List[int]] = None ) -> None:
         '''
         Initializes class with a given dictionary or list. If None is given, initializes with a new dictionary.
+        _version is internal: NestedDicts created for nested values share their parent's mutation counter (or its absence, when caching is off) so that a change made through either one invalidates both caches.
+
+        param data: dict or list to wrap
+        param bool cache: cache derived data (flatten and the findall/findall_kv index) until the data is changed through a NestedDict; see the class Caveats
 
         Exceptions:
          - TypeError: A type other than dict, list or None was given for data. 
         '''
-        if data and not isinstance(data,(dict,list)):
+        if data is not None and not isinstance(data, (dict,list)):
             raise TypeError("Only dict or list can be a nested dictionary.")
 
-        self._data = data or {}              #sets data or initializes an empty dict
-        self._datatype = type(self._data)
+        self._data: Union[dict,list] = {} if data is None else data   #sets data or initializes an empty dict; an empty dict or list given is used as is so changes reach the caller's object
+        if _version is None and cache:
+            _version = [0]
+        self._version = _version    #mutation counter, or None when caching is off; a list so it can be shared (see _derived)
+        self._cache: Optional[Dict[str,Any]] = None
         return None
 
     #private functions
-    def _construct_path(self, keypath: list, d: Union[dict,list]) -> None:
-        '''
-        Travels down existing path or constructs it using keypath map.
-        Warning: keypath parameter gets destroyed.
-        '''
-        if keypath:
-            key = keypath[0]
-            if isinstance(d,dict):
-                if key not in d.keys():
-                    d[key] = {}
-                return self._construct_path(keypath[1:], d[key])
-            else: #d was a list
-                try:
-                    if key == len(d): #if consecutive index given, append a new dictionary for a new list
-                        d.append({}) #append an empty list
-                    return self._construct_path(keypath[1:], d[key])
-                except IndexError as e:
-                    raise IndexError(f'[{key}] IndexError: {e}')
-                except TypeError as e:
-                    raise TypeError(f'[{key}] TypeError: {e}')
-                except KeypathError as e:
-                    raise KeypathError(f'[{key}]{e}')
-            return self._construct_path(keypath[1:], d[key])
-        
-        #base case: empty list, return none
-        return None
-
-    def _traverse( self, keypath, construct_path = False ):
+    def _construct_path(self, keypath: Iterable[Any], d: Any) -> Any:
         '''
-        Traverse a dictionary with a given key path. 
-        While faster than recursion, the functools.reduce method doesn't allow for tracking along keys the way nesteddict_v1.1.0 had (which was useful for debugging).
-
-        param list keypath: The key path; either a single key or a list of keys.
+        Travels down existing path or constructs it using keypath map. Returns the container found (or created) at the end of the keypath.
+        A plain loop over the keypath, so deep keypaths need no recursion and no keypath slices. Each step is taken by _step, which dispatches on the container type through _STEP.
         '''
-        if construct_path:
-            self._construct_path( keypath, self._data )
-
-        if isinstance(keypath, list):
-            return reduce(operator.getitem, keypath, self._data)
-        else:
-            return self._data[keypath]
+        for key in keypath:
+            d = _step(d, key)
+        return d
 
+    def _get_raw(self, keypath: Iterable) -> Any:
+        '''
+        Returns the value at keypath as is (never wrapped as a NestedDict). Used internally wherever the value is only a stepping stone; keypath can be any iterable of keys (i.e., a list or a parsed keypath tuple).
+        '''
+        try:
+            if _c_traverse is not None:
+                return _c_traverse(self._data, keypath)
+            d: Any = self._data
+            for key in keypath:
+                d = d[key]
+        except (KeyError, IndexError, TypeError) as e:
+            raise self._keypath_error(keypath, e) from e
+        return d
+
+    def _keypath_error(self, keypath: Iterable, error: Exception) -> KeypathError:
+        '''
+        Builds the KeypathError for a failed traversal of keypath, naming the key it halted at. The keypath is walked a second time to find that key, so the traversal loops don't pay for tracking their position on the (common) successful path.
+        '''
+        d: Any = self._data
+        for i, key in enumerate(keypath):
+            try:
+                d = d[key]
+            except (KeyError, IndexError, TypeError):
+                return KeypathError(f"{list(keypath)} halted at [{key!r}] (keypath index {i}; {type(error).__name__}: {error})")
+        return KeypathError(f"{list(keypath)}: {type(error).__name__}: {error}")
+
+    def _derived(self) -> Dict[str,Any]:
+        '''
+        Returns the cache for data derived from self._data (i.e., the flattened tree), emptied whenever the shared mutation counter has moved on since it was filled. When caching is off (self._version is None), a new empty dict is returned instead.
+        Every method that modifies the data through a NestedDict bumps self._version[0] when caching is on (inlined as `if self._version is not None: self._version[0] += 1`, since these are hot paths).
+        '''
+        if self._version is None:   #caching off: a throwaway dict, so nothing is kept
+            return {}
+        version = self._version[0]
+        cache = self._cache
+        if cache is None or cache["version"] != version:
+            cache = self._cache = {"version": version}
+        return cache
+
+    def invalidate(self) -> None:
+        '''
+        Discards cached derived data (i.e., flatten). Only needed with cache=True, after modifying the underlying data directly rather than through a NestedDict.
+        '''
+        if self._version is not None:
+            self._version[0] += 1
 
     def __bool__(self) -> bool:
         return bool(self._data)
@@ -119,36 +218,49 @@ class NestedDict:
     def __eq__(self, other: Any) -> bool:
         return self._data == other
 
-    def unnest( self ):
+    def unnest( self ) -> Union[dict,list]:
         return self._data
 
-    @classmethod
-    def _nestize( cls, d ):
+    @staticmethod
+    def _nestize( d: Any, version: Optional[List[int]] = None ) -> Any:
         '''
         Returns d as NestedDict if a dictionary or a list. Else returns original d back
+        A staticmethod (no class binding needed); __getitem__ inlines this check entirely. Pass the parent's _version so the new NestedDict shares its mutation counter.
         '''
-        if isinstance(d,(dict,list)):
-            return cls( d )
+        t = type(d)
+        if t is dict or t is list or isinstance(d, (dict,list)):   #exact types checked first; they are by far the most common
+            return NestedDict( d, _version=version )
         else:
             return d
 
-    def __getitem__( self, keypath ):
+    def __getitem__( self, keypath: Any ) -> Any:
         '''
         Returns a NestedDict of value if a dict or list. Otherwise just returns the value.
-        '''
-        item = self._traverse(keypath)
-        return self._nestize( item )
 
-    def _cast_index(self, item):
+        Exceptions:
+         - KeyError, IndexError, TypeError: A single key that doesn't exist (raised as is).
+         - KeypathError: A keypath that can't be followed; the message names the key it halted at. Also a KeyError, IndexError and TypeError.
+        Single keys (the usual d["key"] access) take the first branch: one subscript and one type compare, with _nestize inlined.
         '''
-        Tries to cast item into an int, otherwise returns the original item. Used with parsing a keypath_str.
-        '''
-        try:
-            return int(item)
-        except ValueError:      #assume item wasn't meant to be an integer and return
-            return item
-
-    def get(self, keypath_str:str, sep:str = '.'):
+        value: Any
+        if type(keypath) is not list:
+            value = self._data[keypath]
+        else:                               #lists are assumed a keypath; a plain loop is cheaper than reduce
+            try:
+                if _c_traverse is not None:
+                    value = _c_traverse(self._data, keypath)
+                else:
+                    value = self._data
+                    for key in keypath:
+                        value = value[key]
+            except (KeyError, IndexError, TypeError) as e:
+                raise self._keypath_error(keypath, e) from e
+        t = type(value)
+        if t is dict or t is list or isinstance(value, (dict,list)):
+            return NestedDict( value, _version=self._version )
+        return value
+
+    def get(self, keypath_str:str, sep:str = '.') -> Any:
         '''
         Get value using a string with a seperator. Default seperator is a dot, but this can be changed using the sep parameter.
 
@@ -157,8 +269,40 @@ class NestedDict:
         param str keypath_str: keypath represented by a string with seperators defined by sep
         param str sep: seperator used for parsing keypath_str
         '''
-        keypath = [self._cast_index(item) for item in keypath_str.split(sep)]
-        return self.__getitem__(keypath)
+        return self._nestize( self._get_raw( _parse_keypath(keypath_str, sep) ), self._version )
+
+    def path(self, *keys: Any) -> Any:
+        '''
+        Variadic keypath access; nested_dict.path('path','to','key') is the same as nested_dict[['path','to','key']] or nested_dict['path']['to']['key'].
+        The whole keypath is walked in one call, without building a keypath list or a NestedDict for every intermediate level (only the final value is wrapped, if a dict or list). The loop and the wrap check are inlined as in __getitem__; use at() when the raw value is enough.
+
+        param keys: keys that make up the keypath
+        '''
+        value: Any
+        try:
+            if _c_traverse is not None:
+                value = _c_traverse(self._data, keys)
+            else:
+                value = self._data
+                for key in keys:
+                    value = value[key]
+        except (KeyError, IndexError, TypeError) as e:
+            raise self._keypath_error(keys, e) from e
+        t = type(value)
+        if t is dict or t is list or isinstance(value, (dict,list)):
+            return NestedDict( value, _version=self._version )
+        return value
+
+    def at(self, keypath: Any) -> Any:
+        '''
+        Same as nested_dict[keypath] (a single key, or a list of keys as a keypath) but returns the raw value: dicts and lists are not wrapped as NestedDict. The cheapest read when NestedDict methods aren't needed on the result (i.e., before passing the value on to other code).
+        The returned dicts and lists are the original objects. With cache=True, changing them (i.e., nested_dict.at('a')['y'] = 2) isn't seen by findall, findall_kv or flatten until invalidate() is called; change them through the NestedDict instead (nested_dict[['a','y']] = 2) to keep the cache current.
+
+        param keypath: a key or a keypath list
+        '''
+        if type(keypath) is not list:
+            return self._data[keypath]
+        return self._get_raw(keypath)
 
     def __iter__(self) -> Iterator:
         return iter(self._data)
@@ -169,17 +313,23 @@ class NestedDict:
     def __ne__(self, other: Any) -> bool:
         return self._data != other
 
-    def __setitem__( self, keypath, value ) -> None: 
-
-        if isinstance(keypath,list):
-            journeykeys, destinationkey = keypath[:-1], keypath[-1]
-            self._traverse(journeykeys)[destinationkey] = value
+    def __setitem__( self, keypath: Any, value: Any ) -> None: 
+        if self._version is not None:
+            self._version[0] += 1
+        if type(keypath) is list:
+            d: Any = self._data
+            try:
+                for key in keypath[:-1]:
+                    d = d[key]
+                d[keypath[-1]] = value
+            except (KeyError, IndexError, TypeError) as e:
+                raise self._keypath_error(keypath, e) from e
         else:
             self._data[keypath] = value
 
         return None
     
-    def set( self, keypath_str:str, value, sep:str = '.' ) -> None:
+    def set( self, keypath_str:str, value: Any, sep:str = '.' ) -> None:
         '''
         Set value using a string with a seperator. Default seperator is a dot, but this can be changed using the sep parameter.
 
@@ -188,72 +338,252 @@ class NestedDict:
         param str keypath_str: keypath represented by a string with seperators defined by sep
         param value: value to be set at keypath
         param str sep: seperator used for parsing keypath_str
+
+        Exceptions:
+         - KeypathError: The keypath can't be followed, or the value can't be set at its destination (i.e., a list index out of range); the message names the key it halted at.
         '''
-        keypath = [self._cast_index(item) for item in keypath_str.split(sep)]
-        self.__setitem__(keypath, value)
+        if self._version is not None:
+            self._version[0] += 1
+        keypath = _parse_keypath(keypath_str, sep)
+        d: Any = self._data
+        try:
+            for key in keypath[:-1]:
+                d = d[key]
+            d[ keypath[-1] ] = value
+        except (KeyError, IndexError, TypeError) as e:
+            raise self._keypath_error(keypath, e) from e
 
-    def __str__(self) -> str:
-        #return f"{str(self._data)}"
-        return f"{__class__.__name__}({str(self._data)})"
-    
-    def __repr__(self):
-        #return f"{str(self._data)}"
-        return f"{__class__.__name__}({str(self._data)})"
+    def __repr__(self) -> str:
+        return f"NestedDict({self._data!r})"   #also used for str(); object.__str__ falls back to __repr__
 
     def clear(self) -> None:
+        if self._version is not None:
+            self._version[0] += 1
         return self._data.clear()
 
-    def copy(self) -> dict:
+    def copy(self) -> Union[dict,list]:
         return self._data.copy()
 
-    def keys(self):
-        if isinstance(self._data,list): #if a list, give all possible indecies of a list
-            return list( range( len(self._data) ) )
+    def view(self) -> Union[MappingProxyType,tuple]:
+        '''
+        Read-only access to the top level of the data without copying it: a MappingProxyType over the underlying dict (reflects later changes). A list is returned as a tuple, which is a (shallow) snapshot.
+        This is the cheap alternative to copy() when the result is only iterated or read. Nested dicts and lists are not protected; they are the original objects.
+        '''
+        if isinstance(self._data, dict):
+            return MappingProxyType(self._data)
+        return tuple(self._data)
+
+    def keys(self) -> Union[range,KeysView]:
+        if isinstance(self._data, list): #if a list, give all possible indecies of a list (a range; nothing is materialized)
+            return range( len(self._data) )
         return self._data.keys()
 
-    def dumps(self, *args, **kwargs):
+    def dumps(self, *args: Any, **kwargs: Any) -> str:
         '''
         Shortcut to json.dumps for the underlying dictionary. Same thing as json.dumps( nestd_dict.unnest() ) if nestd_dict were the NestedDict.
         See json.dumps for parameters.
         '''
-        import json
         return json.dumps( self._data,*args, **kwargs)
 
-    def insert(self, keypath: list, value, construct_path=True ) -> None: 
+    def insert(self, keypath: Sequence[Any], value: Any, construct_path: bool = True ) -> None: 
         '''
         Tries to insert a new value by constructing a path if it doesn't exist and inserting the value.
+        If the destination is a list, a destination key equal to the list's length appends the value (the same rule _construct_path uses along the way).
         '''
+        if self._version is not None:
+            self._version[0] += 1
         journeykeys, destinationkey = keypath[:-1], keypath[-1]
-        self._traverse( journeykeys, construct_path=True )[ destinationkey ] = value
+        d = self._construct_path( journeykeys, self._data )
+        if isinstance(d, list) and destinationkey == len(d):
+            d.append( value )
+        else:
+            d[ destinationkey ] = value
+
+    def bulk_insert(self, items: Iterable[Any]) -> None:
+        '''
+        Inserts many (keypath, value) pairs; the same as calling insert for each pair, in the given order.
+        Consecutive keypaths that share leading keys reuse the containers already reached for the previous keypath instead of descending from the top again, so only the keys that differ are traversed (or constructed). Long keypaths grouped by their leading keys benefit most; short keypaths that barely share leading keys can be slower than repeated insert calls.
+        Items aren't reordered, so dict key order and list appends come out the same as with repeated insert calls.
+
+        param items: iterable of (keypath, value) pairs (i.e., tuples); keypaths are like those used with insert
+        '''
+        if self._version is not None:
+            self._version[0] += 1
+        nodes: List[Any] = [ self._data ]  #nodes[i] is the container reached after the first i journey keys of the previous keypath
+        previous: Sequence[Any] = []       #journey keys of the previous keypath
+        for keypath, value in items:
+            journeykeys, destinationkey = keypath[:-1], keypath[-1]
 
-    def findall(self, key) -> list:
+            if journeykeys == previous:     #sibling of the previous keypath: same container
+                d = nodes[-1]
+            else:
+                depth = 0               #number of leading journey keys shared with the previous keypath
+                for previouskey, key in zip(previous, journeykeys):
+                    if previouskey != key:
+                        break
+                    depth += 1
+                del nodes[depth+1:]
+
+                d = nodes[depth]
+                for key in journeykeys[depth:]:     #same steps as _construct_path, keeping each container reached
+                    d = _step(d, key)
+                    nodes.append(d)
+                previous = journeykeys
+
+            if isinstance(d, list) and destinationkey == len(d):
+                d.append( value )
+            else:
+                d[ destinationkey ] = value
+
+    def _findkeys(self, key: Any) -> List[Tuple[tuple,Any]]:
+        '''
+        Walks the live nested dictionary and returns a (keypath, node) pair for every dict node containing key, in the same depth-first order as the flattened entries (node is the dict that holds key). Used by findall/findall_kv when caching is off.
+        Depth-first with a stack of iterators, one per container being walked; each dict is checked with a single `key in node`. The keys leading to the current container are kept in one shared path list (appended on the way down, popped on the way up), so a keypath tuple is only built for a match rather than for every container.
+        Dispatches to the compiled _nested_c extension when it has been built.
+        '''
+        if _c_findkeys is not None:
+            return _c_findkeys(self._data, key)
+
+        found = []
+        path: List[Any] = []        #keys leading to the container walked by stack[-1]
+        root: Any = self._data
+        if isinstance(root, dict):
+            if key in root:
+                found.append( ((key,), root) )
+            stack: List[Iterator[Tuple[Any,Any]]] = [ iter(root.items()) ]
+        else: #root was a list
+            stack = [ enumerate(root) ]
+        while stack:
+            for k, v in stack[-1]:
+                t = type(v)
+                if t is dict or (t is not list and isinstance(v, dict)):
+                    path.append( k )
+                    if key in v:
+                        found.append( (tuple(path) + (key,), v) )
+                    stack.append( iter(v.items()) )
+                    break
+                if t is list or isinstance(v, list):
+                    path.append( k )
+                    stack.append( enumerate(v) )
+                    break
+            else: #container exhausted; resume its parent
+                stack.pop()
+                if stack:
+                    path.pop()
+        return found
+
+    def _flatten_soa(self) -> Tuple[list,list,List[int],list]:
+        '''
+        Walks the nested dictionary once and returns four parallel lists (keys, steps, parents, values) with an entry for every nested dict key and list index (containers included).
+         - keys: the entry's dict key, or _INDEX for list entries (so searches never match a list index).
+         - steps: the entry's dict key or list index, i.e., the last key of its keypath.
+         - parents: index of the entry holding the container the entry is in, or -1 at the top level. Keypaths are rebuilt from these on demand (see the module-level _keypath) rather than storing a keypath for every entry.
+         - values: the entry's raw value.
+        Keeping the keys in their own flat list (a structure of arrays) lets searches index them (see _key_index) instead of walking every nested node.
+        Entries are ordered by node, depth-first: all of a node's entries come before those of its children, which is the order a recursive depth-first search (and _findkeys) finds matches in (and means a parent always comes before its children).
+        Dispatches to the compiled _nested_c extension when it has been built.
+        '''
+        if _c_flatten_soa is not None:
+            return _c_flatten_soa(self._data, _INDEX)
+
+        keys: list = []
+        steps: list = []
+        parents: List[int] = []
+        values: list = []
+        stack: List[Tuple[Any,int]] = [ (self._data, -1) ]
+        i = 0
+        while stack:
+            node, parent = stack.pop()
+            children = []
+            isdict = isinstance(node, dict)
+            for k, v in ( node.items() if isdict else enumerate(node) ):
+                keys.append( k if isdict else _INDEX )
+                steps.append( k )
+                parents.append( parent )
+                values.append( v )
+                t = type(v)
+                if t is dict or t is list or isinstance(v, (dict,list)):
+                    children.append( (v, i) )
+                i += 1
+            stack.extend( reversed(children) ) #reversed so children are popped in their original order
+        return keys, steps, parents, values
+
+    def _soa(self) -> Tuple[list,list,List[int],list]:
+        '''
+        Returns the (keys, steps, parents, values) lists from _flatten_soa; cached (and rebuilt only after the data has been modified) when caching is on.
+        '''
+        derived = self._derived()
+        soa = derived.get("soa")
+        if soa is None:
+            soa = derived["soa"] = self._flatten_soa()
+        return soa
+
+    def _key_index(self) -> Dict[Any,List[int]]:
+        '''
+        Returns {dict key: indices of the flattened entries with that key}, built in one pass over the flattened keys and cached (cache=True only) until the NestedDict is modified.
+        Searching for a key becomes a single dict lookup instead of a scan of every entry; across M searches the cost drops from O(M*N) to O(N + M). Indices are in ascending order, so results keep the flattened (depth-first) order.
+        '''
+        derived = self._derived()
+        index = derived.get("index")
+        if index is None:
+            index = derived["index"] = {}
+            for i, k in enumerate( self._soa()[0] ):
+                if k is not _INDEX:             #list entries are never matched
+                    indices = index.get(k)
+                    if indices is None:
+                        index[k] = [i]
+                    else:
+                        indices.append(i)
+        return index
+
+    def _matches(self, key: Any) -> List[Tuple[int,list]]:
+        '''
+        Returns (index, keypath) pairs for the flattened entries whose dict key is key (cache=True only). Cached per key (up to _FINDALL_CACHE_SIZE keys, least recently used are dropped first) until the NestedDict is modified; callers must copy the keypaths before handing them out.
+        '''
+        derived = self._derived()
+        results = derived.get("findall")
+        if results is None:
+            results = derived["findall"] = {}
+
+        matches = results.pop(key, None)    #popped and re-inserted below so the most recently used keys stay last
+        if matches is None:
+            keys, steps, parents, values = self._soa()
+            matches = [ (i, _keypath(steps, parents, i)) for i in self._key_index().get(key, ()) ]
+            if len(results) >= _FINDALL_CACHE_SIZE:
+                del results[ next(iter(results)) ]  #evict the least recently used key
+        results[key] = matches
+        return matches
+
+    def flatten(self) -> Dict[tuple,Any]:
+        '''
+        Flattens the nested dictionary into a plain dict keyed by keypath tuples, i.e., {'path':{'to':{'key':'val'}}} becomes {('path',):{'to':{'key':'val'}}, ('path','to'):{'key':'val'}, ('path','to','key'):'val'}. Values are the raw (not nestized) values.
+        Walks the live data and builds every keypath tuple on every call unless caching is on (cache=True), in which case the walk and the keypath tuples are cached until the NestedDict is modified and later calls only build the returned dict; each call returns a new dict so the cache can't be changed by callers.
+        '''
+        keys, steps, parents, values = self._soa()
+        derived = self._derived()
+        paths = derived.get("paths")
+        if paths is None:
+            paths = derived["paths"] = []
+            for step, parent in zip(steps, parents):   #parents come before their children, so paths[parent] is always built already
+                paths.append( paths[parent] + (step,) if parent >= 0 else (step,) )
+        return dict( zip(paths, values) )
+
+    def findall(self, key: Any) -> List[list]:
         '''
         Finds matching keys within nested dictionary. Returns the list of keys to ALL found matches.
         NOTE: This returns a list of lists with the nested list being keypaths to a key (even if there is only a single result). 
         
         param key: Any valid dictionary key (usually str or int)
 
+        NOTE: With cache=True, matches are cached per key until the NestedDict is modified (see _matches); each call still returns new lists.
+        
         TODO: Implement ability to search for subsets of a keypath (i.e., keypath = [])
         '''
-        
-        def findkeys(node, kv, nodepath = [] ):
-
-            if isinstance(node, list):
-                for ii, i in enumerate(node):
-                    for x in findkeys(i, kv, nodepath + [ii]):
-                        yield x
-
-            elif isinstance(node, dict):
-                if kv in node:
-                    nodepath.append(kv)
-                    yield nodepath
-                for k, j in node.items():
-                    for x in findkeys(j, kv, nodepath + [k]):
-                        yield x
-        
-        return  list( findkeys(self._data, key) ) #cast generator to list
+        if self._version is None:
+            return [ list(keypath) for keypath, node in self._findkeys(key) ]
+        return [ list(keypath) for i, keypath in self._matches(key) ]
 
-    def findall_kv(self, key) -> list:
+    def findall_kv(self, key: Any) -> List[dict]:
         '''
         Just like findall, but with their values - this may speed up operations that require accessing values after finding a key. Returns list of dictionaries (i.e., [{}] ) that contain 2 whose keys are: 
          - keypath: list of keys that make up the key path.
@@ -262,19 +592,7 @@ class NestedDict:
         
         param key: any valid dictionary key (usually str or int)
         '''
-        def findkeys(node, kv, nodepath = [] ):
-
-            if isinstance(node, list):
-                for ii, i in enumerate(node):
-                    for x in findkeys(i, kv, nodepath + [ii]):
-                        yield x
-
-            elif isinstance(node, dict):
-                if kv in node:
-                    nodepath.append(kv)
-                    yield {"keypath":nodepath, "value":self._nestize(node[kv])}
-                for k, j in node.items():
-                    for x in findkeys(j, kv, nodepath + [k]):
-                        yield x
-        
-        return  list( findkeys(self._data, key) ) #cast generator to list
\ No newline at end of file
+        if self._version is None:
+            return [ {"keypath":list(keypath), "value":self._nestize(node[key])} for keypath, node in self._findkeys(key) ]
+        values = self._soa()[3]
+        return [ {"keypath":list(keypath), "value":self._nestize(values[i], self._version)} for i, keypath in self._matches(key) ]
\ No newline at end of file
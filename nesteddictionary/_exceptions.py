@@ -0,0 +1,6 @@
+'''
+User exceptions for NestedDict. Kept out of __init__.py because the opt-in mypyc build (see setup.py) compiles that module, and mypyc can't compile a class inheriting from several builtin exception types; this module is always left as plain Python.
+'''
+
+class KeypathError(KeyError, IndexError, TypeError): #raised when a keypath can't be followed; subclasses every error a failed step can raise, so existing except clauses still catch it
+    __str__ = Exception.__str__ #KeyError's str() would wrap the message in quotes
@@ -0,0 +1,149 @@
+# cython: language_level=3
+'''
+Optional C implementations of NestedDict's hot loops: keypath traversal (traverse), the live key search behind findall and findall_kv (findkeys) and the flattening walk behind flatten and cached searches (flatten_soa).
+Built by setup.py when Cython is available; otherwise the pure-Python loops in __init__.py are used. Both give the same results (and raise the same exceptions).
+'''
+
+from cpython.dict cimport PyDict_Next
+from cpython.list cimport PyList_GET_ITEM, PyList_GET_SIZE
+from cpython.ref cimport PyObject
+
+def traverse(object root, object keypath):
+    '''
+    Returns the value at keypath within root, the same as walking it with node = node[key]. Dict and list steps are specialized; anything else is subscripted generically so errors match the pure-Python loop.
+    '''
+    cdef object node = root
+    cdef object key
+    for key in keypath:
+        if type(node) is dict:
+            node = (<dict>node)[key]
+        elif type(node) is list:
+            node = (<list>node)[key]
+        else:
+            node = node[key]
+    return node
+
+def findkeys(object root, object key):
+    '''
+    Returns a (keypath tuple, node) pair for every dict node within root containing key, in the same depth-first order as NestedDict._findkeys (node is the dict that holds key).
+    Plain dicts are walked with PyDict_Next and plain lists with PyList_GET_ITEM, resuming each level from its saved position; subclasses are walked with items()/enumerate iterators. The keys leading to the current container are kept in one shared path list, so a keypath tuple is only built for a match.
+    '''
+    cdef list found = []
+    cdef list path = []         #keys leading to the container nodes[-1]
+    cdef list nodes = []        #containers being walked, outermost first
+    cdef list positions = []    #next PyDict_Next position / list index of each plain container
+    cdef list iterators = []    #items()/enumerate iterator of each subclass container, else None
+    cdef object node, child, k, it
+    cdef Py_ssize_t pos
+    cdef PyObject *pk
+    cdef PyObject *pv
+    cdef bint descended
+
+    child = root
+    while True:
+        #enter child: record a match, then push it to be walked
+        if type(child) is dict or ( type(child) is not list and isinstance(child, dict) ):
+            if key in child:
+                path.append(key)
+                found.append( (tuple(path), child) )
+                path.pop()
+        nodes.append(child)
+        positions.append(0)
+        if type(child) is dict or type(child) is list:
+            iterators.append(None)
+        elif isinstance(child, dict):
+            iterators.append(iter(child.items()))
+        else:
+            iterators.append(enumerate(child))
+
+        #find the next container child, leaving exhausted containers on the way up
+        descended = False
+        while nodes and not descended:
+            node = nodes[-1]
+            if type(node) is dict:
+                pos = positions[-1]
+                while PyDict_Next(node, &pos, &pk, &pv):
+                    child = <object>pv
+                    if type(child) is dict or type(child) is list or isinstance(child, (dict, list)):
+                        positions[-1] = pos
+                        path.append(<object>pk)
+                        descended = True
+                        break
+            elif type(node) is list:
+                pos = positions[-1]
+                while pos < PyList_GET_SIZE(node):
+                    child = <object>PyList_GET_ITEM(node, pos)
+                    pos += 1
+                    if type(child) is dict or type(child) is list or isinstance(child, (dict, list)):
+                        positions[-1] = pos
+                        path.append(pos - 1)
+                        descended = True
+                        break
+            else: #a dict or list subclass
+                it = iterators[-1]
+                for k, child in it:
+                    if type(child) is dict or type(child) is list or isinstance(child, (dict, list)):
+                        path.append(k)
+                        descended = True
+                        break
+            if not descended:
+                nodes.pop()
+                positions.pop()
+                iterators.pop()
+                if nodes:
+                    path.pop()
+        if not descended:
+            return found
+
+def flatten_soa(object root, object index_key):
+    '''
+    Returns parallel (keys, steps, parents, values) lists with an entry for every nested dict key and list index within root; list entries get index_key as their key. See NestedDict._flatten_soa.
+    Plain dicts are walked with PyDict_Next and plain lists with PyList_GET_ITEM, skipping the Python-level items()/enumerate iterators. Subclasses (i.e., OrderedDict) are walked with items()/enumerate, so their own ordering is kept.
+    '''
+    cdef list keys = [], steps = [], parents = [], values = []
+    cdef list stack = [ (root, -1) ]
+    cdef list children
+    cdef object node, parent, key, child
+    cdef Py_ssize_t pos, i, n = 0
+    cdef bint isdict
+    cdef PyObject *k
+    cdef PyObject *v
+
+    while stack:
+        node, parent = stack.pop()
+        children = []
+        if type(node) is dict:
+            pos = 0
+            while PyDict_Next(node, &pos, &k, &v):
+                key = <object>k
+                child = <object>v
+                keys.append(key)
+                steps.append(key)
+                parents.append(parent)
+                values.append(child)
+                if type(child) is dict or type(child) is list or isinstance(child, (dict, list)):
+                    children.append( (child, n) )
+                n += 1
+        elif type(node) is list:
+            for i in range(PyList_GET_SIZE(node)):
+                child = <object>PyList_GET_ITEM(node, i)
+                keys.append(index_key)
+                steps.append(i)
+                parents.append(parent)
+                values.append(child)
+                if type(child) is dict or type(child) is list or isinstance(child, (dict, list)):
+                    children.append( (child, n) )
+                n += 1
+        else: #a dict or list subclass
+            isdict = isinstance(node, dict)
+            for key, child in ( node.items() if isdict else enumerate(node) ):
+                keys.append(key if isdict else index_key)
+                steps.append(key)
+                parents.append(parent)
+                values.append(child)
+                if type(child) is dict or type(child) is list or isinstance(child, (dict, list)):
+                    children.append( (child, n) )
+                n += 1
+        children.reverse() #so children are popped in their original order
+        stack.extend(children)
+    return keys, steps, parents, values
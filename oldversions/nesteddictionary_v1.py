@@ -135,13 +135,12 @@ class NestedDict:
         return self._data != other
 
     def __setitem__( self, keypath, value ) -> None: 
-        logger = logging.getLogger()
         if isinstance( value, dict ):
             value = NestedDict(value)               #keep new nested dictionaries consistent
         #try:
         if isinstance(keypath, list):
-            destination = keypath.pop()
-            path = keypath
+            destination = keypath[-1]               #index and slice rather than pop(), which destroyed the caller's keypath
+            path = keypath[:-1]
             self._traverse( keypath=path )[destination] = value
         else:
             self._data[keypath] = value
@@ -258,20 +257,21 @@ class NestedDict:
         insert_recursively(self._data,keypath,value,replace_dest)
 
 
-import logging
-import time
-FORMAT='[%(levelname)s] | %(asctime)s | %(name)15s.%(funcName)-15s |: %(message)s'
-logging.basicConfig(format=FORMAT, level=logging.INFO, datefmt=f'%Y-%m-%d %H:%M:%S {time.tzname[0]}')
+if __name__ == "__main__":  #demo; importing the module no longer configures logging or runs it
+    import logging
+    import time
+    FORMAT='[%(levelname)s] | %(asctime)s | %(name)15s.%(funcName)-15s |: %(message)s'
+    logging.basicConfig(format=FORMAT, level=logging.INFO, datefmt=f'%Y-%m-%d %H:%M:%S {time.tzname[0]}')
 
-logger = logging.getLogger()
+    logger = logging.getLogger()
 
-root = [{"key0":{"key1":"value1",'key12':{"key3":"value"}}}]
-# print( f"root is: {root}" )
-nd = NestedDict( root )
-# print( f"Keys: {nd.keys()}" )
-nd[[0,"key0",'key1']] = 5
-print( nd.findall_kv('key0') )
-print( nd[0][['key0','key1']] )
+    root = [{"key0":{"key1":"value1",'key12':{"key3":"value"}}}]
+    # print( f"root is: {root}" )
+    nd = NestedDict( root )
+    # print( f"Keys: {nd.keys()}" )
+    nd[[0,"key0",'key1']] = 5
+    print( nd.findall_kv('key0') )
+    print( nd[0][['key0','key1']] )
 
-nd.insert([1,'key1','key2'],30,True)
-print( nd.dumps() )
\ No newline at end of file
+    nd.insert([1,'key1','key2'],30,True)
+    print( nd.dumps() )
\ No newline at end of file
@@ -1,8 +1,27 @@
+import os
 import setuptools
 
 with open("README.md", "r") as fh:
     long_description = fh.read()
 
+#The C extension (keypath traversal and flattening) is optional: without Cython (or a compiler) the pure-Python implementation is used. When built, test_c_extension_matches_python in tests/test_NestedDict.py checks it against the pure-Python loops.
+#Cython is declared in pyproject.toml's build requirements, so a plain pip install builds it; it is only cythonized when the .pyx source is present (MANIFEST.in ships it in the sdist).
+ext_modules = []
+if os.path.exists("nesteddictionary/_nested_c.pyx"):
+    try:
+        from Cython.Build import cythonize
+        ext_modules = cythonize(
+            [setuptools.Extension("nesteddictionary._nested_c", ["nesteddictionary/_nested_c.pyx"], optional=True)],
+            language_level=3,
+        )
+    except ImportError:
+        pass
+
+#Opt-in: NESTEDDICTIONARY_MYPYC=1 also compiles the (fully annotated) package module ahead of time with mypyc (requires mypy in the build environment, i.e., pip install --no-build-isolation; the module must pass mypy). nesteddictionary/_exceptions.py is left as plain Python, since mypyc can't compile KeypathError's builtin bases.
+if os.environ.get("NESTEDDICTIONARY_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules += mypycify(["nesteddictionary/__init__.py"])
+
 setuptools.setup(
     name="nesteddictionary",
     version="1.2.2",
@@ -13,6 +32,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/jacobflanagan/nesteddictionary",
     packages=setuptools.find_packages(),
+    ext_modules=ext_modules,
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -1,9 +1,13 @@
 import sys
 import os
+import copy
+import random
+from collections import OrderedDict, defaultdict
+from types import MappingProxyType
 
 sys.path.insert( 0, os.path.join(sys.path[0],"..") )
 
-from nesteddictionary import NestedDict
+from nesteddictionary import NestedDict, KeypathError
 
 #basic mixed nested dictionary
 nested_dict = [ { "key0":{ "key1":"value1", 'key12':{ "key3":"value"} } } ]
@@ -15,11 +19,273 @@ nd = NestedDict( nested_dict )
 keypath = [0,'key0',3]
 nd[keypath] = 5
 
+#Variadic keypath access (same as nd[keypath])
+print( "\nValue at keypath:\n", nd.path(0,'key0',3) )
+
+#Raw (unwrapped) access
+print( "\nRaw value at keypath:\n", nd.at([0,'key0','key12']) )
+
 #Find all key destinations of 3 and return keypath and value (kv = keypath/value)
 print( "\nKeypaths and values containing 3:\n", nd.findall_kv(3) )
 
+#Flatten into a dict keyed by keypath tuples
+print( "\nFlattened:\n", nd.flatten() )
+
 #insert
 nd.insert( [1,'newkey'], 'newval' )
 
+#bulk insert (keypaths sharing leading keys reuse the containers already reached)
+nd.bulk_insert( [ ([2,'a','b'], 1), ([2,'a','c'], 2) ] )
+
 #Example of a JSON dumps
-print( "\nJSON dumps:\n", nd.dumps( indent=2 ) )
\ No newline at end of file
+print( "\nJSON dumps:\n", nd.dumps( indent=2 ) )
+
+#Assert-based checks (collected by pytest; also run when this file is executed directly)
+def _random_tree(rng, depth=0):
+    '''
+    Builds a random mixed tree of dicts, lists and leaves with a small key alphabet, so searched keys repeat at many depths.
+    '''
+    r = rng.random()
+    if depth > 5 or r < 0.3:
+        return rng.randint(0,9)
+    if r < 0.5:
+        return [ _random_tree(rng, depth+1) for _ in range(rng.randint(0,4)) ]
+    return { rng.choice(['a','b','c',0,1]): _random_tree(rng, depth+1) for _ in range(rng.randint(0,5)) }
+
+def _reference_findall(node, key, path=()):
+    '''
+    The straightforward recursive search findall must agree with: a node's own match first, then its children in order.
+    '''
+    if isinstance(node, list):
+        for i, child in enumerate(node):
+            yield from _reference_findall(child, key, path + (i,))
+    elif isinstance(node, dict):
+        if key in node:
+            yield list(path + (key,))
+        for k, child in node.items():
+            yield from _reference_findall(child, key, path + (k,))
+
+def test_findall_matches_recursive_search():
+    rng = random.Random(1)
+    for _ in range(300):
+        tree = _random_tree(rng)
+        if not isinstance(tree, (dict,list)):
+            continue
+        live, cached = NestedDict(tree), NestedDict(tree, cache=True)
+        for key in ['a','b','c',0,1,'missing']:
+            expected = list(_reference_findall(tree, key))
+            assert live.findall(key) == expected
+            assert cached.findall(key) == expected
+            assert [ kv['keypath'] for kv in live.findall_kv(key) ] == expected
+            assert [ kv['keypath'] for kv in cached.findall_kv(key) ] == expected
+        assert live.flatten() == cached.flatten()
+
+def test_findall_is_live_by_default():
+    d = {'a':{}}
+    n = NestedDict(d)
+    assert n.findall('z') == []
+    d['a']['z'] = 1                 #changed behind the NestedDict's back
+    assert n.findall('z') == [['a','z']]
+    n.at('a')['y'] = 2
+    assert n.findall('y') == [['a','y']]
+    n.view()['a']['x'] = 3
+    assert n.findall_kv('x') == [ {'keypath':['a','x'], 'value':3} ]
+    n.copy()['a']['w'] = 4
+    assert ('a','w') in n.flatten()
+
+def test_cache_invalidation():
+    n = NestedDict({'a':{'b':[{'k':1}]}}, cache=True)
+    assert n.findall('k') == [['a','b',0,'k']]
+
+    n[['a','k']] = 2                                    #__setitem__
+    assert n.findall('k') == [['a','k'],['a','b',0,'k']]
+    n.insert(['x','y','k'], 3)                          #insert
+    assert ['x','y','k'] in n.findall('k')
+    n.set('x.y.z', 4)                                   #set
+    assert n.findall('z') == [['x','y','z']]
+    n.bulk_insert([ (['p','k'], 5) ])                   #bulk_insert
+    assert ['p','k'] in n.findall('k')
+
+    sub = n['a']                                        #nested wrappers share the parent's cache state
+    sub['b'][0]['q'] = 6
+    assert n.findall('q') == [['a','b',0,'q']]
+    n.findall_kv('y')[0]['value'].insert(['r'], 7)
+    assert n.findall('r') == [['x','y','r']]
+    assert ('x','y','r') in n.flatten()
+
+    n.unnest()['direct'] = {'k':8}                      #not seen until invalidate()
+    assert ['direct','k'] not in n.findall('k')
+    n.invalidate()
+    assert ['direct','k'] in n.findall('k')
+
+    n.clear()                                           #clear
+    assert n.findall('k') == [] and n.flatten() == {}
+
+def test_findall_results_are_copies():
+    n = NestedDict({'a':{'k':1}}, cache=True)
+    n.findall('k')[0].append('junk')
+    assert n.findall('k') == [['a','k']]
+    n.flatten()[('a',)] = None
+    assert n.flatten()[('a',)] == {'k':1}
+
+def test_bulk_insert_matches_insert():
+    rng = random.Random(3)
+    for _ in range(300):
+        items = [ ( [ rng.choice(['a','b',0,1]) for _ in range(rng.randint(1,4)) ], rng.choice([1, {}, [], 'x']) ) for _ in range(rng.randint(1,30)) ]
+        start = rng.choice([{}, []])
+        one, bulk = NestedDict(copy.deepcopy(start)), NestedDict(copy.deepcopy(start))
+        expected_error = None
+        for keypath, value in items:
+            try:
+                one.insert(keypath, copy.deepcopy(value))
+            except (IndexError, TypeError) as e:
+                expected_error = type(e)
+                break
+        error = None
+        try:
+            bulk.bulk_insert( [ (keypath, copy.deepcopy(value)) for keypath, value in items ] )
+        except (IndexError, TypeError) as e:
+            error = type(e)
+        assert error is expected_error
+        assert bulk.unnest() == one.unnest()
+
+def test_keypath_errors():
+    n = NestedDict({'a':{'b':1}, 'L':[1]})
+    for action in ( lambda: n[['a','missing']], lambda: n.get('a.missing'), lambda: n.path('a','missing') ):
+        try:
+            action()
+        except KeypathError as e:
+            assert isinstance(e, (KeyError, IndexError, TypeError))
+            assert "halted at ['missing']" in str(e)
+        else:
+            raise AssertionError('KeypathError not raised')
+    for action in ( lambda: n.set('L.5', 1), lambda: n.__setitem__(['L',5], 1) ):
+        try:
+            action()
+        except KeypathError as e:
+            assert isinstance(e, IndexError)
+            assert "halted at [5]" in str(e)
+        else:
+            raise AssertionError('KeypathError not raised')
+    for action in ( lambda: n.set('a.missing.x', 1), lambda: n.__setitem__(['a','missing','x'], 1) ):
+        try:
+            action()
+        except KeypathError as e:
+            assert str(e).startswith("['a', 'missing', 'x'] halted at ['missing']")     #the full keypath is reported
+        else:
+            raise AssertionError('KeypathError not raised')
+    try:
+        n['missing']                    #single keys raise the dict's own error
+    except KeypathError:
+        raise AssertionError('single keys should not raise KeypathError')
+    except KeyError:
+        pass
+
+def test_keypath_string_casting():
+    n = NestedDict({'a':[10, 20], 'b':{'+1':'plus', ' 1':'space', '1_0':'underscore', 1:'int', -1:'negative'}})
+    assert n.get('a.1') == 20 and n.get('a.-1') == 20
+    assert n.get('b.1') == 'int' and n.get('b.-1') == 'negative'
+    assert n.get('b.+1') == 'plus' and n.get('b. 1') == 'space' and n.get('b.1_0') == 'underscore'
+
+def test_insert_at_non_container_values():
+    n = NestedDict({'a':{'b':1}})
+    try:
+        n.insert(['a','b','c'], 2)      #1 can't hold 'c'
+    except TypeError as e:
+        assert 'does not support item assignment' in str(e)
+    else:
+        raise AssertionError('TypeError not raised')
+    raw = NestedDict({'a':bytearray(b'xx')})
+    raw.insert(['a',0], 65)             #any value supporting item assignment works at the destination
+    assert raw.unnest() == {'a':bytearray(b'Ax')}
+    tupled = NestedDict()
+    tupled.insert(('p','q'), 1)
+    tupled.bulk_insert([ (('p','r'), 2), [['p','s'], 3] ])
+    assert tupled.unnest() == {'p':{'q':1, 'r':2, 's':3}}
+
+def test_constructor_keeps_given_containers():
+    for empty in ( {}, [] ):
+        n = NestedDict(empty)
+        assert n.unnest() is empty      #kept, so changes reach the caller's object
+    assert NestedDict().unnest() == {}
+    for bad in ( 0, '', 5, 'x', (1,2) ):      #falsy values included; only None means a new dict
+        try:
+            NestedDict(bad)
+        except TypeError as e:
+            assert str(e) == "Only dict or list can be a nested dictionary."
+        else:
+            raise AssertionError('TypeError not raised')
+
+def test_view_and_keys():
+    d = {'a':{'b':1}}
+    view = NestedDict(d).view()
+    assert type(view) is MappingProxyType and view['a'] is d['a']
+    d['c'] = 2
+    assert view['c'] == 2               #a live view, not a copy
+    try:
+        view['x'] = 1
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('view should be read-only')
+    assert NestedDict([1,2]).view() == (1,2)
+    assert NestedDict([1,2]).keys() == range(2)
+    assert list(NestedDict(d).keys()) == ['a','c']
+
+def test_dict_and_list_subclasses():
+    n = NestedDict({'a': defaultdict(dict, {'k':1})})
+    assert n.findall('k') == [['a','k']]
+    n.insert(['a','z','q'], 1)
+    assert n[['a','z','q']] == 1 and isinstance(n['a'], NestedDict)
+    ordered = OrderedDict([('b',1), ('a',{'k':2})])
+    ordered.move_to_end('b')
+    wrapped = NestedDict(ordered)
+    assert wrapped.findall('k') == [['a','k']]
+    assert list(wrapped.flatten()) == [('a',), ('b',), ('a','k')]
+
+def _outcome(action):
+    try:
+        return ('ok', action())
+    except Exception as e:
+        return (type(e), str(e))
+
+def test_c_extension_matches_python():
+    '''
+    When the optional Cython extension is built, runs the same random trees, searches, reads and inserts with and without it; does nothing otherwise.
+    '''
+    import nesteddictionary
+    c_functions = (nesteddictionary._c_findkeys, nesteddictionary._c_flatten_soa, nesteddictionary._c_traverse)
+    if c_functions[0] is None:
+        return
+    keys = ['a','b','c',0,1,'missing']
+    rng = random.Random(7)
+    try:
+        for trial in range(500):
+            tree = _random_tree(rng)
+            if not isinstance(tree, (dict,list)):
+                continue
+            if trial % 3 == 0:     #subclasses take the extension's generic branches
+                tree = OrderedDict( a=tree, b=[ defaultdict(dict, a=copy.deepcopy(tree)) ] )
+            results = []
+            for functions in ( (None, None, None), c_functions ):
+                nesteddictionary._c_findkeys, nesteddictionary._c_flatten_soa, nesteddictionary._c_traverse = functions
+                steps = random.Random(trial)
+                n = NestedDict(copy.deepcopy(tree), cache=trial % 2 == 0)
+                out = [ n._flatten_soa()[1:], n.flatten(), [ n.findall(key) for key in keys ], [ n._findkeys(key) for key in keys ] ]
+                for _ in range(10):
+                    keypath = [ steps.choice(keys + [2,-1]) for _ in range(steps.randint(1,4)) ]
+                    out += [ _outcome(lambda: n.at(keypath)), _outcome(lambda: n.path(*keypath)), _outcome(lambda: n[keypath]) ]
+                    out.append( _outcome(lambda: n.insert(keypath, steps.choice([1, {}, []]))) )
+                    out.append( [ n.findall(key) for key in keys ] )
+                    out.append( [ n.findall_kv(key) for key in keys ] )
+                out.append( repr(n) )
+                results.append( repr(out) )
+            assert results[0] == results[1]
+    finally:
+        nesteddictionary._c_findkeys, nesteddictionary._c_flatten_soa, nesteddictionary._c_traverse = c_functions
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+    print( "\nAll assert-based checks passed." )